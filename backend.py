@@ -4,11 +4,24 @@ Clean architecture with proper filter propagation
 All 14 endpoints with complete filter support
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, g, has_request_context, jsonify, request, send_from_directory
 from flask_cors import CORS
+import json
 import sqlite3
-from datetime import datetime
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, date, timedelta
+from functools import wraps
+from itertools import groupby
+import math
 import os
+import sys
+from urllib.parse import quote
 
 app = Flask(__name__, static_folder='build', static_url_path='')
 CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -56,6 +69,9 @@ def get_db():
     """Get database connection"""
     conn = sqlite3.connect(DB_FILE)
     conn.row_factory = sqlite3.Row
+    # Endpoints under query_guard get their time budget enforced per connection
+    if has_request_context() and g.get('query_deadline'):
+        install_query_budget(conn, g.query_deadline)
     return conn
 
 def dict_from_row(row):
@@ -66,6 +82,456 @@ def rows_to_dicts(rows):
     """Convert list of sqlite3.Row to list of dicts"""
     return [dict(row) for row in rows]
 
+def table_exists(conn, table_name):
+    """True if the table exists (rollup tables only appear once their batch job has run)"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).fetchone() is not None
+
+# ============================================================================
+# RESPONSE FORMATS (ROWS / COLUMNS / PACKED)
+# ============================================================================
+
+# Opt-in chart payload formats, chosen by ?format= or the Accept header.
+# 'rows' (default) is the original [{col: value}, ...] output.
+COLUMNS_MIMETYPE = 'application/vnd.fieldforce.columns+json'
+PACKED_MIMETYPE = 'application/vnd.fieldforce.packed'
+RESPONSE_FORMATS = {'rows', 'columns', 'packed'}
+
+# Column buffers in packed responses start on 8-byte boundaries (typed-array friendly)
+PACKED_ALIGNMENT = 8
+
+def requested_format():
+    """Response format for the current request: rows, columns or packed"""
+    fmt = request.args.get('format')
+    if fmt in RESPONSE_FORMATS:
+        return fmt
+    accept = request.headers.get('Accept', '')
+    if PACKED_MIMETYPE in accept:
+        return 'packed'
+    if COLUMNS_MIMETYPE in accept:
+        return 'columns'
+    return 'rows'
+
+def column_type(values):
+    """Packed column type: int64, float64 or utf8 (may become dict_utf8 when packed)"""
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, int) for v in present):
+        return 'int64'
+    if present and all(isinstance(v, (int, float)) for v in present):
+        return 'float64'
+    return 'utf8'
+
+def pack_columns(names, columns, extra=None):
+    """Encode columns as a packed binary payload
+
+    Layout: uint32 LE header length, UTF-8 JSON header, then column buffers.
+    The header lists each column's name, type and buffers as [offset, length]
+    relative to the end of the header:
+      - 'validity': one uint8 per row (1 = present), only if the column has NULLs
+      - 'indices': int32 LE positions into the string table, dict_utf8 columns only
+      - 'offsets': int32 LE string offsets (strings + 1), utf8 / dict_utf8 columns only
+      - 'values': int64 / float64 LE values (NULLs as 0), or UTF-8 string data
+    String columns where at least half the values repeat are sent as dict_utf8.
+    """
+    body = bytearray()
+
+    def add_buffer(data):
+        body.extend(b'\0' * (-len(body) % PACKED_ALIGNMENT))
+        offset = len(body)
+        body.extend(data)
+        return [offset, len(data)]
+
+    def little_endian(arr):
+        if sys.byteorder == 'big':
+            arr.byteswap()
+        return arr.tobytes()
+
+    row_count = len(columns[0]) if columns else 0
+    header_columns = []
+    for name, values in zip(names, columns):
+        kind = column_type(values)
+        buffers = {}
+        if any(v is None for v in values):
+            buffers['validity'] = add_buffer(bytes(0 if v is None else 1 for v in values))
+        if kind == 'utf8':
+            strings = ['' if v is None else str(v) for v in values]
+            dictionary = {}
+            indices = array('i', [dictionary.setdefault(v, len(dictionary)) for v in strings])
+            if len(dictionary) * 2 <= len(strings):
+                # Repetitive labels (dates, outcome names): store each distinct string once
+                kind = 'dict_utf8'
+                buffers['indices'] = add_buffer(little_endian(indices))
+                strings = list(dictionary)
+            encoded = [v.encode('utf-8') for v in strings]
+            offsets = array('i', [0])
+            for item in encoded:
+                offsets.append(offsets[-1] + len(item))
+            buffers['offsets'] = add_buffer(little_endian(offsets))
+            buffers['values'] = add_buffer(b''.join(encoded))
+        else:
+            typecode = 'q' if kind == 'int64' else 'd'
+            buffers['values'] = add_buffer(little_endian(array(typecode, [0 if v is None else v for v in values])))
+        header_columns.append({'name': name, 'type': kind, 'buffers': buffers})
+
+    header = {'rows': row_count, 'columns': header_columns}
+    if extra:
+        header['meta'] = extra
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    header_bytes += b' ' * (-(4 + len(header_bytes)) % PACKED_ALIGNMENT)
+    return struct.pack('<I', len(header_bytes)) + header_bytes + bytes(body)
+
+def vary_on_accept(response):
+    """The format can come from the Accept header, so caches must key on it"""
+    response.vary.add('Accept')
+    return response
+
+def table_response(names, rows, **extra):
+    """Build the endpoint response from column names and row tuples
+
+    Extra keyword arguments are returned alongside the data (e.g. zoom).
+    Columnar formats never build per-row dicts.
+    """
+    fmt = requested_format()
+    if fmt == 'rows':
+        return vary_on_accept(jsonify({**extra, 'data': [dict(zip(names, row)) for row in rows]}))
+
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in names]
+    if fmt == 'columns':
+        payload = {**extra, 'columns': names, 'rows': len(rows), 'data': dict(zip(names, columns))}
+        response = app.response_class(json.dumps(payload, separators=(',', ':')), mimetype=COLUMNS_MIMETYPE)
+    else:
+        response = app.response_class(pack_columns(names, columns, extra), mimetype=PACKED_MIMETYPE)
+    return vary_on_accept(response)
+
+def rows_response(cursor, **extra):
+    """Build the endpoint response straight from an executed cursor"""
+    if requested_format() == 'rows':
+        return vary_on_accept(jsonify({**extra, 'data': rows_to_dicts(cursor.fetchall())}))
+    names = [description[0] for description in cursor.description]
+    cursor.row_factory = None
+    return table_response(names, cursor.fetchall(), **extra)
+
+# ============================================================================
+# QUERY COST GUARD (TIME BUDGETS & LOAD SHEDDING)
+# ============================================================================
+
+# Default per-endpoint time budget for SQLite work, in seconds
+DEFAULT_QUERY_BUDGET = float(os.environ.get('QUERY_BUDGET_SECONDS', 10))
+
+# Guarded requests allowed to run at once per worker, and how many may wait
+# (startup.sh sizes gunicorn threads from these; keep its defaults the same)
+MAX_CONCURRENT_QUERIES = int(os.environ.get('MAX_CONCURRENT_QUERIES', 4))
+MAX_QUEUED_QUERIES = int(os.environ.get('MAX_QUEUED_QUERIES', 6))
+QUEUE_WAIT_SECONDS = float(os.environ.get('QUEUE_WAIT_SECONDS', 5))
+RETRY_AFTER_SECONDS = 5
+
+# SQLite VM instructions between deadline checks
+PROGRESS_HANDLER_INTERVAL = 10000
+
+# Last good responses per endpoint + query string + format, served when a budget is blown
+DEGRADED_CACHE_SIZE = 256
+
+_guard_lock = threading.Lock()
+_guard_slots = threading.BoundedSemaphore(MAX_CONCURRENT_QUERIES)
+_guard_pending = 0
+_guard_stats = {}
+_degraded_cache = OrderedDict()
+
+def install_query_budget(conn, deadline):
+    """Abort any statement on this connection once the deadline passes"""
+    def check_deadline():
+        if time.monotonic() > deadline:
+            g.query_aborted = True
+            return 1
+        return 0
+    conn.set_progress_handler(check_deadline, PROGRESS_HANDLER_INTERVAL)
+
+def _count(endpoint, counter):
+    with _guard_lock:
+        stats = _guard_stats.setdefault(endpoint, {'completed': 0, 'aborted': 0, 'shed': 0, 'degraded': 0})
+        stats[counter] += 1
+
+def _shed_response(endpoint, reason):
+    _count(endpoint, 'shed')
+    response = jsonify({'error': 'Server busy, please retry', 'reason': reason})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response
+
+def query_guard(budget_seconds=None):
+    """Enforce a time budget and concurrency limit on an endpoint
+
+    Requests beyond MAX_CONCURRENT_QUERIES + MAX_QUEUED_QUERIES are shed with
+    503 + Retry-After. Queries running past the budget are interrupted; the
+    last good response for the same request is served instead if we have one.
+    """
+    budget = budget_seconds or DEFAULT_QUERY_BUDGET
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            global _guard_pending
+            endpoint = request.endpoint or view.__name__
+
+            with _guard_lock:
+                if _guard_pending >= MAX_CONCURRENT_QUERIES + MAX_QUEUED_QUERIES:
+                    shed = True
+                else:
+                    shed = False
+                    _guard_pending += 1
+            if shed:
+                return _shed_response(endpoint, 'queue_full')
+
+            try:
+                if not _guard_slots.acquire(timeout=QUEUE_WAIT_SECONDS):
+                    return _shed_response(endpoint, 'queue_timeout')
+                try:
+                    g.query_deadline = time.monotonic() + budget
+                    response = app.make_response(view(*args, **kwargs))
+                finally:
+                    _guard_slots.release()
+            finally:
+                with _guard_lock:
+                    _guard_pending -= 1
+
+            cache_key = (request.path, request.query_string, requested_format())
+            if g.get('query_aborted'):
+                _count(endpoint, 'aborted')
+                with _guard_lock:
+                    cached = _degraded_cache.get(cache_key)
+                if cached is None:
+                    response = jsonify({'error': f'Query exceeded {budget:g}s budget'})
+                    response.status_code = 503
+                    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+                    return response
+                _count(endpoint, 'degraded')
+                response = vary_on_accept(app.response_class(cached[0], mimetype=cached[1]))
+                response.headers['X-Query-Degraded'] = 'cache'
+                return response
+
+            _count(endpoint, 'completed')
+            if response.status_code == 200:
+                with _guard_lock:
+                    _degraded_cache[cache_key] = (response.get_data(), response.mimetype)
+                    _degraded_cache.move_to_end(cache_key)
+                    while len(_degraded_cache) > DEGRADED_CACHE_SIZE:
+                        _degraded_cache.popitem(last=False)
+            return response
+        return wrapper
+    return decorator
+
+# ============================================================================
+# CONCURRENT QUERY EXECUTOR
+# ============================================================================
+
+# Threads (each with its own read-only connection) per worker process.
+# sqlite3 releases the GIL while stepping, so independent SELECTs overlap -
+# but only with spare cores; with a pool size of 1 queries run in turn instead.
+QUERY_POOL_SIZE = int(os.environ.get('QUERY_POOL_SIZE', min(4, os.cpu_count() or 1)))
+
+_query_pool = None
+_query_pool_pid = None
+_query_pool_lock = threading.Lock()
+_query_local = threading.local()
+
+def _pool_connection():
+    """Read-only connection owned by the current pool thread"""
+    conn = getattr(_query_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(DB_FILE))}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        _query_local.conn = conn
+    return conn
+
+def get_query_pool():
+    """Thread pool for run_queries, created lazily per process (safe across gunicorn forks)"""
+    global _query_pool, _query_pool_pid
+    with _query_pool_lock:
+        if _query_pool is None or _query_pool_pid != os.getpid():
+            _query_pool = ThreadPoolExecutor(max_workers=QUERY_POOL_SIZE, thread_name_prefix='sqlite-read')
+            _query_pool_pid = os.getpid()
+        return _query_pool
+
+def _run_pooled_query(sql, params, deadline):
+    conn = _pool_connection()
+    if deadline is not None:
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_HANDLER_INTERVAL)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.set_progress_handler(None, 0)
+
+def _run_sequential_queries(queries, deadline):
+    """Single-CPU path: every query in turn on one request connection"""
+    conn = get_db()
+    if deadline is not None:
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_HANDLER_INTERVAL)
+    try:
+        return {name: conn.execute(sql, params).fetchall() for name, (sql, params) in queries.items()}
+    except sqlite3.OperationalError:
+        if deadline is not None and time.monotonic() > deadline and has_request_context():
+            g.query_aborted = True
+        raise
+    finally:
+        conn.close()
+
+def run_queries(queries, timeout=None):
+    """Run independent read-only queries concurrently on the query pool
+
+    queries maps a name to SQL or (SQL, params); returns {name: rows}.
+    Each query is interrupted after `timeout` seconds, or at the endpoint's
+    query_guard deadline if that comes first (which then counts as aborted).
+    With QUERY_POOL_SIZE 1 they run one after another on the calling thread.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    if has_request_context() and g.get('query_deadline'):
+        deadline = min(deadline, g.query_deadline) if deadline else g.query_deadline
+
+    queries = {name: (query, ()) if isinstance(query, str) else query for name, query in queries.items()}
+    if QUERY_POOL_SIZE <= 1:
+        return _run_sequential_queries(queries, deadline)
+
+    pool = get_query_pool()
+    futures = {name: pool.submit(_run_pooled_query, sql, params, deadline)
+               for name, (sql, params) in queries.items()}
+
+    results = {}
+    try:
+        for name, future in futures.items():
+            # Small grace period so the progress handler, not the wait, reports the timeout
+            wait = None if deadline is None else max(deadline - time.monotonic(), 0) + 1.0
+            results[name] = future.result(timeout=wait)
+    except (sqlite3.OperationalError, FutureTimeoutError):
+        for future in futures.values():
+            future.cancel()
+        if deadline is not None and time.monotonic() > deadline and has_request_context():
+            g.query_aborted = True
+        raise
+    return results
+
+# ============================================================================
+# DIMENSION INDEX (ID <-> NAME LOOKUPS & TYPEAHEAD)
+# ============================================================================
+
+# How often (seconds) a worker checks whether the database changed
+DIMENSION_REFRESH_SECONDS = float(os.environ.get('DIMENSION_REFRESH_SECONDS', 5))
+
+# Dimension -> (query, attribute columns); every query selects the id first and sorts by name
+DIMENSION_QUERIES = {
+    'regions': ("SELECT region_id, region_name, latitude, longitude FROM dim_region ORDER BY region_name",
+                ['region_name', 'latitude', 'longitude']),
+    'channels': ("SELECT channel_id, channel_name FROM dim_channel ORDER BY channel_name",
+                 ['channel_name']),
+    'agents': ("SELECT agent_id, agent_name, team_name FROM dim_agent ORDER BY agent_name",
+               ['agent_name', 'team_name']),
+    'entities': ("SELECT entity_id, entity_name, entity_type FROM dim_entity ORDER BY entity_name",
+                 ['entity_name', 'entity_type']),
+}
+
+# Dimension -> ids of members with no conversations at all. These are the members
+# the LEFT JOIN from the dimension table used to list with empty values.
+IDLE_MEMBER_QUERIES = {
+    'regions': """SELECT region_id FROM dim_region d
+                  WHERE NOT EXISTS (SELECT 1 FROM fact_conversation fc WHERE fc.region_id = d.region_id)""",
+    'channels': """SELECT channel_id FROM dim_channel d
+                   WHERE NOT EXISTS (SELECT 1 FROM fact_conversation fc WHERE fc.channel_id = d.channel_id)""",
+    'agents': """SELECT agent_id FROM dim_agent d
+                 WHERE NOT EXISTS (SELECT 1 FROM fact_conversation fc WHERE fc.agent_id = d.agent_id)""",
+}
+
+# Typeahead type -> (dimension, name attribute)
+TYPEAHEAD_DIMENSIONS = {
+    'agent': ('agents', 'agent_name'),
+    'entity': ('entities', 'entity_name'),
+}
+
+_dimension_index = None
+_dimension_conn = None
+_dimension_lock = threading.Lock()
+
+def build_prefix_index(members, name_attribute):
+    """Sorted (token, id) pairs: the full normalized name plus each word in it"""
+    entries = set()
+    for member_id, attributes in members.items():
+        normalized = normalize_entity_text(attributes[name_attribute])
+        if not normalized:
+            continue
+        entries.add((normalized, member_id))
+        for word in normalized.split():
+            entries.add((word, member_id))
+    return sorted(entries)
+
+def load_dimension_index(conn):
+    """Read every dimension into {dimension: {id: {attribute: value}}} plus prefix indexes"""
+    index = {}
+    for dimension, (sql, attributes) in DIMENSION_QUERIES.items():
+        index[dimension] = {row[0]: dict(zip(attributes, row[1:])) for row in conn.execute(sql)}
+    index['idle'] = {dimension: {row[0] for row in conn.execute(sql)}
+                     for dimension, sql in IDLE_MEMBER_QUERIES.items()}
+    index['customer_count'] = conn.execute("SELECT COUNT(*) FROM dim_customer").fetchone()[0]
+    index['prefixes'] = {
+        kind: build_prefix_index(index[dimension], name_attribute)
+        for kind, (dimension, name_attribute) in TYPEAHEAD_DIMENSIONS.items()
+    }
+    return index
+
+def get_dimension_index():
+    """Per-worker dimension index, reloaded when the database has changed
+
+    Change detection uses PRAGMA data_version on a dedicated read-only
+    connection, checked at most every DIMENSION_REFRESH_SECONDS.
+    """
+    global _dimension_index, _dimension_conn
+    index = _dimension_index
+    now = time.monotonic()
+    if (index is not None and index['pid'] == os.getpid()
+            and now - index['checked_at'] < DIMENSION_REFRESH_SECONDS):
+        return index
+
+    with _dimension_lock:
+        if _dimension_conn is None or index is None or index['pid'] != os.getpid():
+            _dimension_conn = sqlite3.connect(f"file:{quote(os.path.abspath(DB_FILE))}?mode=ro",
+                                              uri=True, check_same_thread=False)
+            index = None
+        version = _dimension_conn.execute("PRAGMA data_version").fetchone()[0]
+        if index is None or index['version'] != version:
+            index = load_dimension_index(_dimension_conn)
+            index['version'] = version
+            index['pid'] = os.getpid()
+        index['checked_at'] = now
+        _dimension_index = index
+        return index
+
+def attach_dimension(cursor, id_column, dimension, attributes, empty=None, filter_id=None):
+    """Attach names from the dimension index to rows aggregated by id
+
+    attributes are dimension attribute names, or (attribute, output_name)
+    pairs, inserted after id_column. When `empty` (the values for the
+    remaining columns) is given, members with no conversations at all are
+    added, like the LEFT JOIN from the dimension this replaces. If the
+    request filters on this dimension, pass the id as `filter_id` so only
+    that member can be added.
+    Returns (column names, row tuples).
+    """
+    index = get_dimension_index()
+    members = index[dimension]
+    attributes = [(a, a) if isinstance(a, str) else a for a in attributes]
+    names = [description[0] for description in cursor.description]
+    position = names.index(id_column) + 1
+
+    def with_attributes(row):
+        member = members.get(row[position - 1]) or {}
+        return row[:position] + tuple(member.get(a) for a, _ in attributes) + row[position:]
+
+    rows = [with_attributes(tuple(row)) for row in cursor.fetchall()]
+    if empty is not None:
+        seen = {row[position - 1] for row in rows}
+        idle = index['idle'][dimension]
+        rows += [with_attributes((member_id,) + tuple(empty)) for member_id in members
+                 if member_id in idle and member_id not in seen and filter_id in (None, member_id)]
+    return names[:position] + [output for _, output in attributes] + names[position:], rows
+
 # ============================================================================
 # FILTER PARSING & APPLICATION
 # ============================================================================
@@ -131,35 +597,45 @@ def health():
     except Exception as e:
         return jsonify({'status': 'error', 'error': str(e)}), 500
 
+@app.route('/api/health/query-guard', methods=['GET'])
+def health_query_guard():
+    """Query guard counters (completed, aborted, shed, degraded) per endpoint
+
+    Counters live in each gunicorn worker, so this reports the worker that
+    answered (see pid); poll a few times to see the others.
+    """
+    with _guard_lock:
+        stats = {endpoint: dict(counters) for endpoint, counters in _guard_stats.items()}
+        pending = _guard_pending
+    return jsonify({
+        'pid': os.getpid(),
+        'pending': pending,
+        'max_concurrent': MAX_CONCURRENT_QUERIES,
+        'max_queued': MAX_QUEUED_QUERIES,
+        'endpoints': stats,
+    })
+
 @app.route('/api/filters/dimensions', methods=['GET'])
 def get_filter_dimensions():
-    """Get all available filter options"""
+    """Get all available filter options (from the per-worker dimension index)"""
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        # Regions
-        cursor.execute("SELECT region_id, region_name FROM dim_region ORDER BY region_name")
-        regions = rows_to_dicts(cursor.fetchall())
-        
-        # Channels
-        cursor.execute("SELECT channel_id, channel_name FROM dim_channel ORDER BY channel_name")
-        channels = rows_to_dicts(cursor.fetchall())
+        index = get_dimension_index()
+        regions = [{'region_id': region_id, 'region_name': region['region_name']}
+                   for region_id, region in index['regions'].items()]
+        channels = [{'channel_id': channel_id, 'channel_name': channel['channel_name']}
+                    for channel_id, channel in index['channels'].items()]
         
         # Teams - using channels as proxy since dim_team doesn't exist
         # Map channel_id/channel_name to team_id/team_name for frontend compatibility
         teams = [{'team_id': ch['channel_id'], 'team_name': ch['channel_name']} for ch in channels]
         
-        # Agents (for reference, not used as filter in current schema)
-        cursor.execute("SELECT agent_id, agent_name FROM dim_agent ORDER BY agent_name")
-        agents = rows_to_dicts(cursor.fetchall())
-        
-        conn.close()
-        
         return jsonify({
             'regions': regions,
             'teams': teams,  # Using channels as proxy
             'channels': channels,
+            'agents': [{'agent_id': agent_id, 'agent_name': agent['agent_name']}
+                       for agent_id, agent in index['agents'].items()],
+            'customer_count': index['customer_count'],
             'client_types': [],  # Not available in current schema
             'time_ranges': [
                 {'label': 'Last 7 days', 'value': '7'},
@@ -171,57 +647,94 @@ def get_filter_dimensions():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/lookup/typeahead', methods=['GET'])
+def lookup_typeahead():
+    """Prefix search over agent or entity names
+
+    Query params: q (prefix, matched against the full name and each word), type=agent|entity, limit (default 10).
+    """
+    try:
+        kind = request.args.get('type', 'agent')
+        if kind not in TYPEAHEAD_DIMENSIONS:
+            return jsonify({'error': f"type must be one of {', '.join(TYPEAHEAD_DIMENSIONS)}"}), 400
+        try:
+            limit = min(int(request.args.get('limit', '10')), 100)
+        except ValueError:
+            limit = 10
+
+        prefix = normalize_entity_text(request.args.get('q', ''))
+        index = get_dimension_index()
+        dimension, name_attribute = TYPEAHEAD_DIMENSIONS[kind]
+        members = index[dimension]
+        entries = index['prefixes'][kind]
+
+        matches = []
+        seen = set()
+        if prefix:
+            position = bisect_left(entries, (prefix,))
+            while position < len(entries) and len(matches) < limit:
+                token, member_id = entries[position]
+                if not token.startswith(prefix):
+                    break
+                if member_id not in seen:
+                    seen.add(member_id)
+                    matches.append({'id': member_id, **members[member_id]})
+                position += 1
+
+        return jsonify({'type': kind, 'data': matches})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ============================================================================
 # MISSION BRIEF ENDPOINTS
 # ============================================================================
 
-@app.route('/api/mission-brief/tiles', methods=['GET'])
-def mission_brief_tiles():
-    """Get KPI tiles with ALL filters applied"""
-    try:
-        filters = parse_filters(request.args)
-        where_clause = build_where_clause(filters, use_date_join=True)
-        
-        conn = get_db()
-        cursor = conn.cursor()
-        
+def mission_brief_queries(where_clause):
+    """Independent KPI queries behind the mission brief tiles"""
+    return {
         # Total conversations - join on call_date = calendar_date
-        cursor.execute(f"""
+        'total_convs': f"""
             SELECT COUNT(*) as count FROM fact_conversation fc
             JOIN dim_date dd ON fc.call_date = dd.calendar_date
             WHERE {where_clause}
-        """)
-        total_convs = cursor.fetchone()['count'] or 0
-        
+        """,
         # Conversions - using has_appointment (1 = has appointment)
-        cursor.execute(f"""
+        'conversions': f"""
             SELECT SUM(CASE WHEN has_appointment = 1 THEN 1 ELSE 0 END) as count
             FROM fact_conversation fc
             JOIN dim_date dd ON fc.call_date = dd.calendar_date
             WHERE {where_clause}
-        """)
-        conversions = cursor.fetchone()['count'] or 0
-        
+        """,
         # Avg sentiment - using overall_sentiment
-        cursor.execute(f"""
+        'avg_sentiment': f"""
             SELECT AVG(overall_sentiment) as val FROM fact_conversation fc
             JOIN dim_date dd ON fc.call_date = dd.calendar_date
             WHERE {where_clause} AND fc.overall_sentiment IS NOT NULL
-        """)
-        avg_sentiment = cursor.fetchone()['val'] or 0
-        
+        """,
         # Conversion confidence as proxy for risk (higher confidence = lower risk)
-        cursor.execute(f"""
+        'avg_confidence': f"""
             SELECT AVG(conversion_confidence) as val FROM fact_conversation fc
             JOIN dim_date dd ON fc.call_date = dd.calendar_date
             WHERE {where_clause} AND fc.conversion_confidence IS NOT NULL
-        """)
-        avg_confidence = cursor.fetchone()['val'] or 0
+        """,
+    }
+
+@app.route('/api/mission-brief/tiles', methods=['GET'])
+@query_guard()
+def mission_brief_tiles():
+    """Get KPI tiles with ALL filters applied"""
+    try:
+        filters = parse_filters(request.args)
+        where_clause = build_where_clause(filters, use_date_join=True)
+        
+        results = run_queries(mission_brief_queries(where_clause))
+        total_convs = results['total_convs'][0]['count'] or 0
+        conversions = results['conversions'][0]['count'] or 0
+        avg_sentiment = results['avg_sentiment'][0]['val'] or 0
+        avg_confidence = results['avg_confidence'][0]['val'] or 0
         # Convert confidence to risk (inverse, scaled 0-100)
         avg_risk = 100 - (avg_confidence * 100) if avg_confidence else 0
         
-        conn.close()
-        
         conv_rate = (conversions / total_convs * 100) if total_convs > 0 else 0
         
         return jsonify({
@@ -241,6 +754,7 @@ def mission_brief_tiles():
 # ============================================================================
 
 @app.route('/api/field-signal/pulse', methods=['GET'])
+@query_guard()
 def signal_pulse():
     """Daily conversation pulse"""
     try:
@@ -261,14 +775,15 @@ def signal_pulse():
             GROUP BY dd.date_id, dd.calendar_date
             ORDER BY dd.calendar_date
         """)
-        data = rows_to_dicts(cursor.fetchall())
+        response = rows_response(cursor)
         conn.close()
         
-        return jsonify({'data': data})
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/field-signal/issues', methods=['GET'])
+@query_guard()
 def signal_issues():
     """Top issues - using outcome_status as proxy for issues"""
     try:
@@ -301,25 +816,21 @@ def signal_issues():
             ORDER BY volume DESC
             LIMIT 10
         """)
-        rows = cursor.fetchall()
-        # Convert to dicts and ensure issue_id is integer
-        data = []
-        for idx, row in enumerate(rows, 1):
-            data.append({
-                'issue_id': idx,
-                'issue_name': row['issue_name'] or 'Unknown',
-                'volume': row['volume'] or 0,
-                'avg_sentiment': row['avg_sentiment'] or 0,
-                'severity_score': row['severity_score'] or 0,
-                'conversions': row['conversions'] or 0
-            })
+        # Number the issues (integer issue_id) and default missing values
+        names = ['issue_id', 'issue_name', 'volume', 'avg_sentiment', 'severity_score', 'conversions']
+        rows = [
+            (idx, row['issue_name'] or 'Unknown', row['volume'] or 0, row['avg_sentiment'] or 0,
+             row['severity_score'] or 0, row['conversions'] or 0)
+            for idx, row in enumerate(cursor.fetchall(), 1)
+        ]
         conn.close()
         
-        return jsonify({'data': data})
+        return table_response(names, rows)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/field-signal/severity-distribution', methods=['GET'])
+@query_guard()
 def signal_severity():
     """Severity distribution - using conversion_confidence as proxy"""
     try:
@@ -346,14 +857,15 @@ def signal_severity():
                     ELSE 'LOW'
                 END
         """)
-        data = rows_to_dicts(cursor.fetchall())
+        response = rows_response(cursor)
         conn.close()
         
-        return jsonify({'data': data})
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/field-signal/hotspots', methods=['GET'])
+@query_guard(budget_seconds=15)
 def signal_hotspots():
     """Geographic hotspots"""
     try:
@@ -364,22 +876,217 @@ def signal_hotspots():
         cursor = conn.cursor()
         cursor.execute(f"""
             SELECT 
-                dr.region_id,
-                dr.region_name,
-                dr.latitude,
-                dr.longitude,
+                fc.region_id,
                 COUNT(DISTINCT fc.conversation_id) as conversation_count,
                 ROUND(100 - AVG(COALESCE(fc.conversion_confidence, 0.5) * 100), 2) as avg_risk
-            FROM dim_region dr
-            LEFT JOIN fact_conversation fc ON dr.region_id = fc.region_id
-            LEFT JOIN dim_date dd ON fc.call_date = dd.calendar_date
-            WHERE {where_clause} OR fc.conversation_id IS NULL
-            GROUP BY dr.region_id
+            FROM fact_conversation fc
+            JOIN dim_date dd ON fc.call_date = dd.calendar_date
+            WHERE {where_clause}
+            GROUP BY fc.region_id
         """)
-        data = rows_to_dicts(cursor.fetchall())
+        # Regions without conversations still show on the map (risk defaults to 50)
+        names, rows = attach_dimension(cursor, 'region_id', 'regions',
+                                       ['region_name', 'latitude', 'longitude'], empty=(0, 50.0),
+                                       filter_id=filters.get('region_id'))
         conn.close()
+        response = table_response(names, rows)
         
-        return jsonify({'data': data})
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# GEO AGGREGATION (ZOOM-AWARE MAP CELLS)
+# ============================================================================
+
+# Precomputed zoom levels (Web Mercator tile zoom); requests snap down to these
+GEO_ZOOM_LEVELS = [4, 7, 10, 13]
+
+# Seed coordinates for customer cities; extend via ref_geo_location
+GEO_CITY_COORDINATES = {
+    'atlanta': (33.7490, -84.3880),
+    'acworth': (34.0659, -84.6769),
+    'alpharetta': (34.0754, -84.2941),
+    'augusta': (33.4735, -82.0105),
+    'cumming': (34.2073, -84.1402),
+    'decatur': (33.7748, -84.2963),
+    'duluth': (34.0029, -84.1446),
+    'dunwoody': (33.9462, -84.3346),
+    'evans': (33.5337, -82.1307),
+    'grovetown': (33.4504, -82.1982),
+    'johns creek': (34.0289, -84.1986),
+    'kennesaw': (34.0234, -84.6155),
+    'lawrenceville': (33.9562, -83.9880),
+    'marietta': (33.9526, -84.5499),
+    'martinez': (33.5174, -82.0757),
+    'roswell': (34.0232, -84.3616),
+    'sandy springs': (33.9304, -84.3733),
+    'smyrna': (33.8840, -84.5144),
+}
+
+GEO_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ref_geo_location (
+        location_key TEXT PRIMARY KEY,
+        latitude REAL NOT NULL,
+        longitude REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS agg_geo_cell (
+        zoom INTEGER NOT NULL,
+        cell_x INTEGER NOT NULL,
+        cell_y INTEGER NOT NULL,
+        call_date DATE NOT NULL,
+        region_id INTEGER,
+        channel_id INTEGER,
+        conversation_count INTEGER,
+        risk_sum REAL,
+        latitude_sum REAL,
+        longitude_sum REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_agg_geo_cell_tile ON agg_geo_cell(zoom, cell_x, cell_y);
+"""
+
+def geo_location_key(city, address=None):
+    """Lookup key for ref_geo_location: 'address|city' or just 'city'"""
+    city = (city or '').strip().lower()
+    if address:
+        return f"{address.strip().lower()}|{city}"
+    return city
+
+def lat_lon_to_cell(latitude, longitude, zoom):
+    """Web Mercator tile (x, y) containing a point at the given zoom"""
+    n = 2 ** zoom
+    lat = math.radians(max(min(latitude, 85.0511), -85.0511))
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1.0 - math.log(math.tan(lat) + 1.0 / math.cos(lat)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def snap_zoom(zoom):
+    """Largest precomputed zoom level not above the requested one"""
+    levels = [level for level in GEO_ZOOM_LEVELS if level <= zoom]
+    return levels[-1] if levels else GEO_ZOOM_LEVELS[0]
+
+def build_geo_cells(db_file=None):
+    """Rebuild agg_geo_cell from conversations and customer locations
+
+    Customers are placed by address, then city, via ref_geo_location, falling
+    back to the region's coordinates. Cells are kept per call_date, region and
+    channel so the map endpoint can still apply the global filters.
+    Returns the number of cell rows written.
+    """
+    conn = sqlite3.connect(db_file or DB_FILE)
+    try:
+        conn.executescript(GEO_SCHEMA)
+        conn.executemany(
+            "INSERT OR IGNORE INTO ref_geo_location (location_key, latitude, longitude) VALUES (?, ?, ?)",
+            [(key, lat, lon) for key, (lat, lon) in GEO_CITY_COORDINATES.items()]
+        )
+        locations = {key: (lat, lon) for key, lat, lon in
+                     conn.execute("SELECT location_key, latitude, longitude FROM ref_geo_location")}
+
+        cursor = conn.execute("""
+            SELECT 
+                fc.call_date,
+                fc.region_id,
+                fc.channel_id,
+                100 - COALESCE(fc.conversion_confidence, 0.5) * 100 as risk,
+                dc.customer_city,
+                dc.customer_address,
+                dr.latitude,
+                dr.longitude
+            FROM fact_conversation fc
+            LEFT JOIN dim_customer dc ON fc.customer_id = dc.customer_id
+            LEFT JOIN dim_region dr ON fc.region_id = dr.region_id
+        """)
+
+        cells = {}
+        for call_date, region_id, channel_id, risk, city, address, region_lat, region_lon in cursor:
+            point = (locations.get(geo_location_key(city, address))
+                     or locations.get(geo_location_key(city)))
+            if point is None and region_lat is not None and region_lon is not None:
+                point = (region_lat, region_lon)
+            if point is None:
+                continue
+            for zoom in GEO_ZOOM_LEVELS:
+                cell_x, cell_y = lat_lon_to_cell(point[0], point[1], zoom)
+                key = (zoom, cell_x, cell_y, call_date, region_id, channel_id)
+                cell = cells.setdefault(key, [0, 0.0, 0.0, 0.0])
+                cell[0] += 1
+                cell[1] += risk
+                cell[2] += point[0]
+                cell[3] += point[1]
+
+        conn.execute("DELETE FROM agg_geo_cell")
+        conn.executemany("""
+            INSERT INTO agg_geo_cell (
+                zoom, cell_x, cell_y, call_date, region_id, channel_id,
+                conversation_count, risk_sum, latitude_sum, longitude_sum
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [key + tuple(values) for key, values in cells.items()])
+        conn.commit()
+        return len(cells)
+    finally:
+        conn.close()
+
+@app.route('/api/field-signal/geo-cells', methods=['GET'])
+@query_guard()
+def signal_geo_cells():
+    """Map cells in view with conversation counts and average risk
+
+    Query params: zoom (map zoom), bbox=west,south,east,north plus the usual filters.
+    """
+    try:
+        filters = parse_filters(request.args)
+        days = filters.get('time_range', '7')
+
+        try:
+            # Map clients send fractional zooms (e.g. 7.5) while animating
+            zoom = snap_zoom(int(float(request.args.get('zoom', GEO_ZOOM_LEVELS[0]))))
+        except (ValueError, OverflowError):
+            zoom = GEO_ZOOM_LEVELS[0]
+
+        where_parts = [f"zoom = {zoom}", f"call_date >= date('now', '-{days} days')"]
+        if 'region_id' in filters:
+            where_parts.append(f"region_id = {filters['region_id']}")
+        if 'channel_id' in filters:
+            where_parts.append(f"channel_id = {filters['channel_id']}")
+
+        bbox = request.args.get('bbox')
+        if bbox:
+            try:
+                west, south, east, north = [float(v) for v in bbox.split(',')]
+            except ValueError:
+                return jsonify({'error': 'bbox must be west,south,east,north'}), 400
+            min_x, min_y = lat_lon_to_cell(north, west, zoom)
+            max_x, max_y = lat_lon_to_cell(south, east, zoom)
+            where_parts.append(f"cell_x BETWEEN {min_x} AND {max_x}")
+            where_parts.append(f"cell_y BETWEEN {min_y} AND {max_y}")
+
+        conn = get_db()
+        if not table_exists(conn, 'agg_geo_cell'):
+            conn.close()
+            return table_response(
+                ['cell_x', 'cell_y', 'conversation_count', 'avg_risk', 'latitude', 'longitude'],
+                [], zoom=zoom, hint='Run: python backend.py build-geo-cells'
+            )
+
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT 
+                cell_x,
+                cell_y,
+                SUM(conversation_count) as conversation_count,
+                ROUND(SUM(risk_sum) / SUM(conversation_count), 2) as avg_risk,
+                SUM(latitude_sum) / SUM(conversation_count) as latitude,
+                SUM(longitude_sum) / SUM(conversation_count) as longitude
+            FROM agg_geo_cell
+            WHERE {" AND ".join(where_parts)}
+            GROUP BY cell_x, cell_y
+        """)
+        response = rows_response(cursor, zoom=zoom)
+        conn.close()
+        
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -388,6 +1095,7 @@ def signal_hotspots():
 # ============================================================================
 
 @app.route('/api/field-ops/agents', methods=['GET'])
+@query_guard(budget_seconds=15)
 def ops_agents():
     """Agent performance"""
     try:
@@ -398,27 +1106,27 @@ def ops_agents():
         cursor = conn.cursor()
         cursor.execute(f"""
             SELECT 
-                da.agent_id,
-                da.agent_name,
+                fc.agent_id,
                 COUNT(DISTINCT fc.conversation_id) as conversation_count,
                 ROUND(AVG(fc.overall_sentiment), 2) as avg_sentiment,
                 COUNT(CASE WHEN fc.has_appointment = 1 THEN 1 END) as conversions,
                 ROUND(AVG(fc.conversion_confidence), 2) as avg_quality
-            FROM dim_agent da
-            LEFT JOIN fact_conversation fc ON da.agent_id = fc.agent_id
-            LEFT JOIN dim_date dd ON fc.call_date = dd.calendar_date
-            WHERE {where_clause} OR fc.conversation_id IS NULL
-            GROUP BY da.agent_id
-            ORDER BY conversation_count DESC
+            FROM fact_conversation fc
+            JOIN dim_date dd ON fc.call_date = dd.calendar_date
+            WHERE {where_clause}
+            GROUP BY fc.agent_id
         """)
-        data = rows_to_dicts(cursor.fetchall())
+        names, rows = attach_dimension(cursor, 'agent_id', 'agents', ['agent_name'], empty=(0, None, 0, None))
         conn.close()
+        rows.sort(key=lambda row: row[2], reverse=True)
+        response = table_response(names, rows)
         
-        return jsonify({'data': data})
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/field-ops/teams', methods=['GET'])
+@query_guard(budget_seconds=15)
 def ops_teams():
     """Team performance - using channel as proxy for teams since dim_team doesn't exist"""
     try:
@@ -429,23 +1137,217 @@ def ops_teams():
         cursor = conn.cursor()
         cursor.execute(f"""
             SELECT 
-                dc.channel_id as team_id,
-                dc.channel_name as team_name,
+                fc.channel_id as team_id,
                 COUNT(DISTINCT fc.conversation_id) as conversation_count,
                 ROUND(AVG(fc.overall_sentiment), 2) as avg_sentiment,
                 COUNT(CASE WHEN fc.has_appointment = 1 THEN 1 END) as conversions,
                 ROUND(AVG(fc.conversion_confidence), 2) as avg_quality
-            FROM dim_channel dc
-            LEFT JOIN fact_conversation fc ON dc.channel_id = fc.channel_id
-            LEFT JOIN dim_date dd ON fc.call_date = dd.calendar_date
-            WHERE {where_clause} OR fc.conversation_id IS NULL
-            GROUP BY dc.channel_id
-            ORDER BY conversation_count DESC
+            FROM fact_conversation fc
+            JOIN dim_date dd ON fc.call_date = dd.calendar_date
+            WHERE {where_clause}
+            GROUP BY fc.channel_id
         """)
-        data = rows_to_dicts(cursor.fetchall())
+        names, rows = attach_dimension(cursor, 'team_id', 'channels', [('channel_name', 'team_name')],
+                                       empty=(0, None, 0, None), filter_id=filters.get('channel_id'))
         conn.close()
+        rows.sort(key=lambda row: row[2], reverse=True)
+        response = table_response(names, rows)
         
-        return jsonify({'data': data})
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# AGENT BEHAVIOR SCORECARD
+# ============================================================================
+
+# Behavior dimensions: agent_<dim> in fact_agent_behavior_per_mention,
+# avg_<dim> in agg_agent_behavior_scorecard
+BEHAVIOR_DIMENSIONS = ['empathy', 'clarity', 'confidence', 'knowledge', 'listening']
+
+# Change in overall score between consecutive periods that counts as a trend
+TREND_THRESHOLD = 0.05
+
+def load_behavior_rows(conn):
+    """Load every scored mention with its agent and call date in one query"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT
+            fc.agent_id,
+            fc.call_date,
+            fc.conversation_id,
+            fabm.agent_empathy,
+            fabm.agent_clarity,
+            fabm.agent_confidence,
+            fabm.agent_knowledge,
+            fabm.agent_listening,
+            fabm.overall_agent_score
+        FROM fact_agent_behavior_per_mention fabm
+        JOIN fact_entity_mention fem ON fabm.mention_id = fem.mention_id
+        JOIN fact_conversation fc ON fem.conversation_id = fc.conversation_id
+        ORDER BY fc.agent_id, fc.call_date
+    """)
+    # Plain tuples so rows can be shipped to worker processes
+    return [tuple(row) for row in cursor.fetchall()]
+
+def period_start(call_date, period='week'):
+    """Map a call date to the first day of its week (Monday) or month"""
+    day = date.fromisoformat(str(call_date)[:10])
+    if period == 'month':
+        return day.replace(day=1).isoformat()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+def column_mean(values):
+    """Mean of a column, skipping NULLs"""
+    present = [v for v in values if v is not None]
+    return sum(present) / len(present) if present else None
+
+def coaching_priority(gap_score):
+    """Coaching priority from the agent's weakest dimension score"""
+    if gap_score is None:
+        return None
+    if gap_score < 0.3:
+        return 'CRITICAL'
+    if gap_score < 0.5:
+        return 'HIGH'
+    if gap_score < 0.7:
+        return 'MEDIUM'
+    return 'LOW'
+
+def classify_trend(previous_score, current_score):
+    """Compare an agent's overall score against their previous period"""
+    if previous_score is None or current_score is None:
+        return 'new'
+    delta = current_score - previous_score
+    if delta >= TREND_THRESHOLD:
+        return 'improving'
+    if delta <= -TREND_THRESHOLD:
+        return 'declining'
+    return 'stable'
+
+def score_agent_periods(job):
+    """Build scorecard rows for one agent's behavior rows (runs in a worker process)
+
+    Rows arrive sorted by call_date, so each period is a contiguous run and
+    averages are taken column-wise over the run.
+    """
+    agent_id, rows, period = job
+    scorecards = []
+    previous_score = None
+    for period_date, group in groupby(rows, key=lambda r: period_start(r[1], period)):
+        columns = list(zip(*group))
+        averages = [column_mean(column) for column in columns[3:8]]
+        overall = column_mean(columns[8])
+
+        scored = [(avg, dim) for avg, dim in zip(averages, BEHAVIOR_DIMENSIONS) if avg is not None]
+        strength = max(scored) if scored else (None, None)
+        gap = min(scored) if scored else (None, None)
+
+        scorecards.append((
+            agent_id,
+            period_date,
+            *[round(avg, 4) if avg is not None else None for avg in averages],
+            round(overall, 4) if overall is not None else None,
+            len(set(columns[2])),
+            strength[1].capitalize() if strength[1] else None,
+            gap[1].capitalize() if gap[1] else None,
+            coaching_priority(gap[0]),
+            classify_trend(previous_score, overall),
+        ))
+        if overall is not None:
+            previous_score = overall
+    return scorecards
+
+def build_agent_scorecards(db_file=None, period='week', workers=None):
+    """Recompute agg_agent_behavior_scorecard for every agent and period
+
+    Behavior rows are loaded in bulk, partitioned by agent and scored across a
+    process pool, then upserted on UNIQUE(agent_id, period_date).
+    Returns the number of scorecard rows written.
+    """
+    conn = sqlite3.connect(db_file or DB_FILE)
+    try:
+        rows = load_behavior_rows(conn)
+        jobs = [(agent_id, list(group), period)
+                for agent_id, group in groupby(rows, key=lambda r: r[0])]
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) < 2:
+            results = [score_agent_periods(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(jobs) // (workers * 4))
+                results = list(pool.map(score_agent_periods, jobs, chunksize=chunksize))
+
+        scorecards = [row for result in results for row in result]
+        conn.executemany("""
+            INSERT INTO agg_agent_behavior_scorecard (
+                agent_id, period_date,
+                avg_empathy, avg_clarity, avg_confidence, avg_knowledge, avg_listening,
+                overall_agent_score, conversations_reviewed,
+                primary_strength, primary_gap, coaching_priority, trend
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(agent_id, period_date) DO UPDATE SET
+                avg_empathy = excluded.avg_empathy,
+                avg_clarity = excluded.avg_clarity,
+                avg_confidence = excluded.avg_confidence,
+                avg_knowledge = excluded.avg_knowledge,
+                avg_listening = excluded.avg_listening,
+                overall_agent_score = excluded.overall_agent_score,
+                conversations_reviewed = excluded.conversations_reviewed,
+                primary_strength = excluded.primary_strength,
+                primary_gap = excluded.primary_gap,
+                coaching_priority = excluded.coaching_priority,
+                trend = excluded.trend,
+                created_at = CURRENT_TIMESTAMP
+        """, scorecards)
+        conn.commit()
+        return len(scorecards)
+    finally:
+        conn.close()
+
+@app.route('/api/field-ops/behavior-scorecard', methods=['GET'])
+@query_guard()
+def ops_behavior_scorecard():
+    """Per-agent, per-period behavior scorecards from agg_agent_behavior_scorecard"""
+    try:
+        filters = parse_filters(request.args)
+        days = filters.get('time_range', '7')
+        where_parts = [f"aabs.period_date >= date('now', '-{days} days')"]
+
+        agent_id = request.args.get('agent_id')
+        if agent_id:
+            try:
+                where_parts.append(f"aabs.agent_id = {int(agent_id)}")
+            except ValueError:
+                pass
+
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT 
+                aabs.agent_id,
+                aabs.period_date,
+                ROUND(aabs.avg_empathy, 2) as avg_empathy,
+                ROUND(aabs.avg_clarity, 2) as avg_clarity,
+                ROUND(aabs.avg_confidence, 2) as avg_confidence,
+                ROUND(aabs.avg_knowledge, 2) as avg_knowledge,
+                ROUND(aabs.avg_listening, 2) as avg_listening,
+                ROUND(aabs.overall_agent_score, 2) as overall_score,
+                aabs.conversations_reviewed,
+                aabs.primary_strength,
+                aabs.primary_gap,
+                aabs.coaching_priority,
+                aabs.trend
+            FROM agg_agent_behavior_scorecard aabs
+            WHERE {" AND ".join(where_parts)}
+            ORDER BY aabs.period_date DESC, overall_score DESC
+        """)
+        names, rows = attach_dimension(cursor, 'agent_id', 'agents', ['agent_name'])
+        conn.close()
+        response = table_response(names, rows)
+        
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -454,6 +1356,7 @@ def ops_teams():
 # ============================================================================
 
 @app.route('/api/field-strategy/outcomes', methods=['GET'])
+@query_guard()
 def strategy_outcomes():
     """Outcome distribution - using outcome_status from fact_conversation"""
     try:
@@ -472,14 +1375,15 @@ def strategy_outcomes():
             WHERE {where_clause}
             GROUP BY fc.outcome_status
         """)
-        data = rows_to_dicts(cursor.fetchall())
+        response = rows_response(cursor)
         conn.close()
         
-        return jsonify({'data': data})
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/field-strategy/risk-by-region', methods=['GET'])
+@query_guard(budget_seconds=15)
 def strategy_risk():
     """Risk by region"""
     try:
@@ -490,26 +1394,27 @@ def strategy_risk():
         cursor = conn.cursor()
         cursor.execute(f"""
             SELECT 
-                dr.region_id,
-                dr.region_name,
+                fc.region_id,
                 COUNT(DISTINCT fc.conversation_id) as conversation_count,
                 ROUND(100 - AVG(COALESCE(fc.conversion_confidence, 0.5) * 100), 2) as avg_risk,
                 ROUND(AVG(fc.overall_sentiment), 2) as avg_sentiment
-            FROM dim_region dr
-            LEFT JOIN fact_conversation fc ON dr.region_id = fc.region_id
-            LEFT JOIN dim_date dd ON fc.call_date = dd.calendar_date
-            WHERE {where_clause} OR fc.conversation_id IS NULL
-            GROUP BY dr.region_id
-            ORDER BY avg_risk DESC
+            FROM fact_conversation fc
+            JOIN dim_date dd ON fc.call_date = dd.calendar_date
+            WHERE {where_clause}
+            GROUP BY fc.region_id
         """)
-        data = rows_to_dicts(cursor.fetchall())
+        names, rows = attach_dimension(cursor, 'region_id', 'regions', ['region_name'], empty=(0, 50.0, None),
+                                       filter_id=filters.get('region_id'))
         conn.close()
+        rows.sort(key=lambda row: row[3], reverse=True)
+        response = table_response(names, rows)
         
-        return jsonify({'data': data})
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/field-strategy/outcome-trend', methods=['GET'])
+@query_guard(budget_seconds=15)
 def strategy_trend():
     """Outcome trend over time - using outcome_status from fact_conversation"""
     try:
@@ -529,49 +1434,732 @@ def strategy_trend():
             GROUP BY dd.date_id, dd.calendar_date, fc.outcome_status
             ORDER BY dd.calendar_date, fc.outcome_status
         """)
-        data = rows_to_dicts(cursor.fetchall())
+        response = rows_response(cursor)
+        conn.close()
+        
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# COHORT FUNNEL ANALYSIS
+# ============================================================================
+
+# Cohort dimension -> agg_customer_funnel column (all taken from the customer's first conversation)
+FUNNEL_COHORTS = {
+    'week': 'cohort_week',
+    'region': 'region_id',
+    'channel': 'channel_id',
+    'agent': 'agent_id',
+}
+
+FUNNEL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS agg_customer_funnel (
+        customer_id INTEGER PRIMARY KEY,
+        first_call_date DATE,
+        cohort_week DATE,
+        region_id INTEGER,
+        channel_id INTEGER,
+        agent_id INTEGER,
+        furthest_stage_order INTEGER,
+        conversation_count INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_agg_customer_funnel_first_call ON agg_customer_funnel(first_call_date);
+"""
+
+def load_funnel_stages(conn):
+    """Funnel stages from ref_funnel_stage in stage_order"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT funnel_stage, stage_order FROM ref_funnel_stage ORDER BY stage_order")
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+def customer_progressions(rows):
+    """Single sorted pass over conversations, one progression row per customer
+
+    rows: (customer_id, call_date, stage_order, region_id, channel_id, agent_id)
+    sorted by customer_id, call_date. Cohort attributes come from the first
+    conversation; the furthest stage is the highest stage_order seen.
+    """
+    for customer_id, customer_rows in groupby(rows, key=lambda r: r[0]):
+        first = next(customer_rows)
+        furthest = first[2] or 0
+        conversations = 1
+        for row in customer_rows:
+            conversations += 1
+            if row[2] is not None and row[2] > furthest:
+                furthest = row[2]
+        yield (customer_id, first[1], period_start(first[1]), first[3], first[4], first[5],
+               furthest, conversations)
+
+def funnel_from_counts(counts, stages):
+    """Reached / conversion / drop-off per stage from {furthest_stage_order: customers}"""
+    customers = sum(counts.values())
+    funnel = []
+    previous = customers
+    for stage, order in stages:
+        # Customers whose furthest stage sits below this one (including unstaged)
+        below = sum(count for furthest, count in counts.items() if furthest < order)
+        reached = customers - below
+        funnel.append({
+            'funnel_stage': stage,
+            'stage_order': order,
+            'customers_reached': reached,
+            'conversion_rate': round(reached / previous * 100, 1) if previous else 0,
+            'drop_off': previous - reached,
+        })
+        previous = reached
+    return {'customers': customers, 'stages': funnel}
+
+def build_conversion_funnel(db_file=None):
+    """Rebuild agg_customer_funnel and the weekly agg_conversion_funnel
+
+    Conversations are read once in (customer_id, call_date) order and folded
+    into one progression row per customer, so the endpoint only has to group
+    customers by cohort. Returns the number of customers written.
+    """
+    conn = sqlite3.connect(db_file or DB_FILE)
+    try:
+        conn.executescript(FUNNEL_SCHEMA)
+        stages = load_funnel_stages(conn)
+
+        cursor = conn.execute("""
+            SELECT 
+                fc.customer_id,
+                fc.call_date,
+                rfs.stage_order,
+                fc.region_id,
+                fc.channel_id,
+                fc.agent_id
+            FROM fact_conversation fc
+            LEFT JOIN ref_funnel_stage rfs ON fc.funnel_stage = rfs.funnel_stage COLLATE NOCASE
+            ORDER BY fc.customer_id, fc.call_date
+        """)
+        conn.execute("DELETE FROM agg_customer_funnel")
+        conn.executemany("""
+            INSERT INTO agg_customer_funnel (
+                customer_id, first_call_date, cohort_week, region_id, channel_id, agent_id,
+                furthest_stage_order, conversation_count
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, customer_progressions(cursor.fetchall()))
+
+        weekly = {}
+        for cohort_week, furthest, customers in conn.execute("""
+            SELECT cohort_week, furthest_stage_order, COUNT(*)
+            FROM agg_customer_funnel
+            GROUP BY cohort_week, furthest_stage_order
+        """):
+            weekly.setdefault(cohort_week, {})[furthest] = customers
+
+        conn.execute("DELETE FROM agg_conversion_funnel")
+        conn.executemany("""
+            INSERT INTO agg_conversion_funnel (funnel_stage, stage_count, conversion_rate, period_date)
+            VALUES (?, ?, ?, ?)
+        """, [(stage['funnel_stage'], stage['customers_reached'], stage['conversion_rate'], period_date)
+              for period_date, counts in weekly.items()
+              for stage in funnel_from_counts(counts, stages)['stages']])
+
+        customers = conn.execute("SELECT COUNT(*) FROM agg_customer_funnel").fetchone()[0]
+        conn.commit()
+        return customers
+    finally:
+        conn.close()
+
+@app.route('/api/field-strategy/funnel', methods=['GET'])
+@query_guard()
+def strategy_funnel():
+    """Stage-to-stage conversion and drop-off per cohort
+
+    Query params: cohort=week|region|channel|agent (default week), agent_id, plus the usual filters.
+    Filters select customers by their first conversation; progression covers all
+    of their conversations (see build_conversion_funnel).
+    """
+    try:
+        filters = parse_filters(request.args)
+        days = filters.get('time_range', '7')
+        where_parts = [f"first_call_date >= date('now', '-{days} days')"]
+        if 'region_id' in filters:
+            where_parts.append(f"region_id = {filters['region_id']}")
+        if 'channel_id' in filters:
+            where_parts.append(f"channel_id = {filters['channel_id']}")
+
+        agent_id = request.args.get('agent_id')
+        if agent_id:
+            try:
+                where_parts.append(f"agent_id = {int(agent_id)}")
+            except ValueError:
+                pass
+
+        cohort_by = request.args.get('cohort', 'week')
+        if cohort_by not in FUNNEL_COHORTS:
+            return jsonify({'error': f"cohort must be one of {', '.join(FUNNEL_COHORTS)}"}), 400
+        cohort_column = FUNNEL_COHORTS[cohort_by]
+
+        conn = get_db()
+        stages = load_funnel_stages(conn)
+        if not table_exists(conn, 'agg_customer_funnel'):
+            conn.close()
+            return jsonify({
+                'cohort_by': cohort_by,
+                'overall': funnel_from_counts({}, stages),
+                'data': [],
+                'hint': 'Run: python backend.py build-funnel',
+            })
+
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT 
+                {cohort_column} as cohort,
+                furthest_stage_order,
+                COUNT(*) as customers
+            FROM agg_customer_funnel
+            WHERE {" AND ".join(where_parts)}
+            GROUP BY {cohort_column}, furthest_stage_order
+        """)
+        cohorts = {}
+        overall = {}
+        for row in cursor.fetchall():
+            cohorts.setdefault(row['cohort'], {})[row['furthest_stage_order']] = row['customers']
+            overall[row['furthest_stage_order']] = overall.get(row['furthest_stage_order'], 0) + row['customers']
+        conn.close()
+
+        data = [{'cohort': cohort, **funnel_from_counts(cohorts[cohort], stages)}
+                for cohort in sorted(cohorts, key=lambda c: (c is None, c))]
+
+        return jsonify({
+            'cohort_by': cohort_by,
+            'overall': funnel_from_counts(overall, stages),
+            'data': data,
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# ENTITY MATCHING (DISCOVERED / PENDING -> dim_entity)
+# ============================================================================
+
+# Similarity at or above which a discovered entity is mapped automatically
+ENTITY_AUTO_MATCH_SCORE = 0.85
+# Candidates below this are not worth a reviewer's time
+ENTITY_REVIEW_MIN_SCORE = 0.4
+# Character n-gram size for the inverted index
+ENTITY_NGRAM_SIZE = 3
+
+ENTITY_MATCH_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS stg_entity_match_queue (
+        match_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_table TEXT NOT NULL,
+        source_id INTEGER NOT NULL,
+        entity_text TEXT NOT NULL,
+        candidate_entity_id INTEGER NOT NULL,
+        similarity_score REAL NOT NULL,
+        auto_mapped INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(source_table, source_id),
+        FOREIGN KEY (candidate_entity_id) REFERENCES dim_entity(entity_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_stg_entity_match_queue_score ON stg_entity_match_queue(similarity_score);
+"""
+
+# Queue rows (aliased q) whose source still awaits review. Auto-mapped stg rows
+# stay listed until a reviewer moves them out of PENDING.
+OPEN_ENTITY_MATCH = """
+    ((q.source_table = 'stg_discovered_entities' AND EXISTS (
+        SELECT 1 FROM stg_discovered_entities sde
+        WHERE sde.discovered_entity_id = q.source_id
+          AND sde.review_status = 'PENDING'
+          AND (sde.mapped_to_entity_id IS NULL OR q.auto_mapped = 1)))
+     OR (q.source_table = 'new_entities_pending' AND EXISTS (
+        SELECT 1 FROM new_entities_pending nep
+        WHERE nep.pending_id = q.source_id AND nep.status = 'pending')))
+"""
+
+def normalize_entity_text(text):
+    """Lowercase, punctuation to spaces, collapsed whitespace"""
+    cleaned = ''.join(ch if ch.isalnum() else ' ' for ch in str(text or '').lower())
+    return ' '.join(cleaned.split())
+
+def entity_ngrams(normalized):
+    """Set of padded character n-grams for a normalized name"""
+    padded = f" {normalized} "
+    if len(padded) <= ENTITY_NGRAM_SIZE:
+        return {padded}
+    return {padded[i:i + ENTITY_NGRAM_SIZE] for i in range(len(padded) - ENTITY_NGRAM_SIZE + 1)}
+
+def build_entity_index(conn):
+    """Inverted n-gram index over dim_entity names and aliases
+
+    Returns (postings, names, exact) where postings maps n-gram -> list of
+    name ids, names[name_id] = (entity_id, n-gram count) and exact maps a
+    normalized name to its entity_id. Aliases may be comma, semicolon or pipe separated.
+    """
+    postings = {}
+    names = []
+    exact = {}
+    for entity_id, entity_name, entity_alias in conn.execute(
+            "SELECT entity_id, entity_name, entity_alias FROM dim_entity"):
+        variants = [entity_name]
+        if entity_alias:
+            variants.extend(entity_alias.replace(';', ',').replace('|', ',').split(','))
+        for variant in variants:
+            normalized = normalize_entity_text(variant)
+            if not normalized or normalized in exact:
+                continue
+            exact[normalized] = entity_id
+            grams = entity_ngrams(normalized)
+            name_id = len(names)
+            names.append((entity_id, len(grams)))
+            for gram in grams:
+                postings.setdefault(gram, []).append(name_id)
+    return postings, names, exact
+
+def best_entity_match(normalized, postings, names, exact):
+    """(entity_id, Dice similarity on n-grams) of the closest indexed name, or (None, 0)"""
+    if normalized in exact:
+        return exact[normalized], 1.0
+    grams = entity_ngrams(normalized)
+    shared = {}
+    for gram in grams:
+        for name_id in postings.get(gram, ()):
+            shared[name_id] = shared.get(name_id, 0) + 1
+    if not shared:
+        return None, 0.0
+    best_id, best_score = None, 0.0
+    for name_id, count in shared.items():
+        score = 2.0 * count / (len(grams) + names[name_id][1])
+        if score > best_score:
+            best_id, best_score = names[name_id][0], score
+    return best_id, best_score
+
+def match_discovered_entities(db_file=None):
+    """Match pending discovered entities against dim_entity in one batch
+
+    Distinct texts from stg_discovered_entities (unmapped, PENDING) and
+    new_entities_pending (pending) are scored once each against the n-gram
+    index. High-confidence stg rows get mapped_to_entity_id and
+    semantic_similarity_score; every candidate above the review floor lands
+    in stg_entity_match_queue, and queued rows whose source has since been
+    reviewed are dropped. Returns the number of queued candidates.
+    """
+    conn = sqlite3.connect(db_file or DB_FILE)
+    try:
+        conn.executescript(ENTITY_MATCH_SCHEMA)
+        conn.execute(f"DELETE FROM stg_entity_match_queue AS q WHERE NOT {OPEN_ENTITY_MATCH}")
+        postings, names, exact = build_entity_index(conn)
+
+        sources = [('stg_discovered_entities', row_id, text) for row_id, text in conn.execute("""
+            SELECT discovered_entity_id, entity_text FROM stg_discovered_entities
+            WHERE mapped_to_entity_id IS NULL AND review_status = 'PENDING'
+        """)]
+        sources += [('new_entities_pending', row_id, text) for row_id, text in conn.execute("""
+            SELECT pending_id, entity_name FROM new_entities_pending WHERE status = 'pending'
+        """)]
+
+        scored = {}
+        queue = []
+        for source_table, source_id, text in sources:
+            normalized = normalize_entity_text(text)
+            if not normalized:
+                continue
+            if normalized not in scored:
+                scored[normalized] = best_entity_match(normalized, postings, names, exact)
+            entity_id, score = scored[normalized]
+            if entity_id is None or score < ENTITY_REVIEW_MIN_SCORE:
+                continue
+            auto_mapped = int(source_table == 'stg_discovered_entities' and score >= ENTITY_AUTO_MATCH_SCORE)
+            queue.append((source_table, source_id, text, entity_id, round(score, 4), auto_mapped))
+
+        conn.executemany("""
+            INSERT INTO stg_entity_match_queue (
+                source_table, source_id, entity_text, candidate_entity_id, similarity_score, auto_mapped
+            ) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source_table, source_id) DO UPDATE SET
+                entity_text = excluded.entity_text,
+                candidate_entity_id = excluded.candidate_entity_id,
+                similarity_score = excluded.similarity_score,
+                auto_mapped = excluded.auto_mapped,
+                created_at = CURRENT_TIMESTAMP
+        """, queue)
+        conn.executemany("""
+            UPDATE stg_discovered_entities
+            SET mapped_to_entity_id = ?, semantic_similarity_score = ?
+            WHERE discovered_entity_id = ?
+        """, [(entity_id, score, source_id)
+              for source_table, source_id, _, entity_id, score, auto_mapped in queue if auto_mapped])
+        conn.commit()
+        return len(queue)
+    finally:
+        conn.close()
+
+@app.route('/api/field-hq/entity-matches', methods=['GET'])
+@query_guard()
+def hq_entity_matches():
+    """Entity match review queue, best candidates first
+
+    Only rows whose source entity is still pending review are listed.
+    Query params: include_mapped=1 to also list auto-mapped rows, limit (default 100).
+    """
+    try:
+        try:
+            limit = min(int(request.args.get('limit', '100')), 1000)
+        except ValueError:
+            limit = 100
+        where_parts = [OPEN_ENTITY_MATCH]
+        if request.args.get('include_mapped') != '1':
+            where_parts.append("q.auto_mapped = 0")
+
+        conn = get_db()
+        if not table_exists(conn, 'stg_entity_match_queue'):
+            conn.close()
+            return table_response(
+                ['match_id', 'source_table', 'source_id', 'entity_text', 'candidate_entity_id',
+                 'candidate_entity_name', 'candidate_entity_type', 'similarity_score', 'auto_mapped'],
+                [], hint='Run: python backend.py match-entities'
+            )
+
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT 
+                q.match_id,
+                q.source_table,
+                q.source_id,
+                q.entity_text,
+                q.candidate_entity_id,
+                q.similarity_score,
+                q.auto_mapped
+            FROM stg_entity_match_queue q
+            WHERE {" AND ".join(where_parts)}
+            ORDER BY q.similarity_score DESC, q.match_id
+            LIMIT {limit}
+        """)
+        names, rows = attach_dimension(cursor, 'candidate_entity_id', 'entities',
+                                       [('entity_name', 'candidate_entity_name'),
+                                        ('entity_type', 'candidate_entity_type')])
         conn.close()
+        response = table_response(names, rows)
         
-        return jsonify({'data': data})
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ============================================================================
+# DATA QUALITY PROFILER
+# ============================================================================
+
+# Tables profiled per day of created_at. Every listed column gets null / min / max;
+# 'distinct' columns also get exact per-day distinct counts and 'foreign_keys'
+# columns count non-NULL values with no parent row (orphans).
+DATA_QUALITY_PROFILES = {
+    'fact_conversation': {
+        'columns': ['agent_id', 'customer_id', 'region_id', 'call_date', 'overall_sentiment',
+                    'conversion_confidence', 'funnel_stage', 'outcome_status'],
+        'distinct': ['agent_id', 'customer_id', 'outcome_status'],
+        'foreign_keys': {
+            'agent_id': ('dim_agent', 'agent_id'),
+            'customer_id': ('dim_customer', 'customer_id'),
+            'region_id': ('dim_region', 'region_id'),
+        },
+    },
+    'fact_entity_mention': {
+        'columns': ['conversation_id', 'entity_id', 'sentiment_polarity', 'confidence'],
+        'distinct': ['entity_id'],
+        'foreign_keys': {
+            'conversation_id': ('fact_conversation', 'conversation_id'),
+            'entity_id': ('dim_entity', 'entity_id'),
+        },
+    },
+    'fact_agent_behavior_per_mention': {
+        'columns': ['mention_id', 'overall_agent_score'],
+        'distinct': [],
+        'foreign_keys': {
+            'mention_id': ('fact_entity_mention', 'mention_id'),
+        },
+    },
+}
+
+# Pseudo-column holding the table-level row count per day
+TABLE_ROW_COLUMN = '*'
+
+# The (table_name, column_name, value) index lets the endpoint count one
+# column's all-time distinct values without scanning every profiled day
+DATA_QUALITY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS agg_data_quality_profile (
+        profile_date TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        column_name TEXT NOT NULL,
+        row_count INTEGER DEFAULT 0,
+        null_count INTEGER DEFAULT 0,
+        distinct_count INTEGER,
+        orphan_count INTEGER,
+        min_value,
+        max_value,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(profile_date, table_name, column_name)
+    );
+    CREATE TABLE IF NOT EXISTS agg_data_quality_values (
+        profile_date TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        column_name TEXT NOT NULL,
+        value,
+        PRIMARY KEY (profile_date, table_name, column_name, value)
+    );
+    CREATE INDEX IF NOT EXISTS idx_agg_data_quality_values_column
+        ON agg_data_quality_values(table_name, column_name, value);
+    CREATE TABLE IF NOT EXISTS etl_watermark (
+        job_name TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        last_row_id INTEGER DEFAULT 0,
+        last_created_at TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (job_name, table_name)
+    );
+"""
+
+def normalize_timestamp(value):
+    """created_at as 'YYYY-MM-DD HH:MM:SS' (ISO or M/D/YYYY H:MM as stored by the loaders)"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        pass
+    for fmt in ('%m/%d/%Y %H:%M', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y'):
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            continue
+    return None
+
+def profile_table_batch(conn, table, spec, after_row_id):
+    """Per-day stats for rows of one table past the watermark row id
+
+    Returns (stats, values, last_row_id, last_created_at) where stats maps
+    (day, column) -> [rows, nulls, orphans, min, max] and values maps
+    (day, column) -> set of distinct values.
+    """
+    columns = spec['columns']
+    orphan_checks = [
+        f"(t.{column} IS NOT NULL AND NOT EXISTS "
+        f"(SELECT 1 FROM {parent} p WHERE p.{key} = t.{column}))"
+        for column, (parent, key) in spec['foreign_keys'].items()
+    ]
+    cursor = conn.execute(f"""
+        SELECT t.rowid, t.created_at, {", ".join(f"t.{c}" for c in columns)}
+               {"".join(", " + check for check in orphan_checks)}
+        FROM {table} t
+        WHERE t.rowid > ?
+        ORDER BY t.rowid
+    """, (after_row_id,))
+
+    fk_columns = list(spec['foreign_keys'])
+    stats = {}
+    values = {}
+    last_row_id = after_row_id
+    last_created_at = None
+    for row in cursor:
+        last_row_id = row[0]
+        created_at = normalize_timestamp(row[1])
+        if created_at and (last_created_at is None or created_at > last_created_at):
+            last_created_at = created_at
+        day = created_at[:10] if created_at else 'unknown'
+
+        table_stats = stats.setdefault((day, TABLE_ROW_COLUMN), [0, 0, None, None, None])
+        table_stats[0] += 1
+
+        orphans = dict(zip(fk_columns, row[2 + len(columns):]))
+        for column, value in zip(columns, row[2:2 + len(columns)]):
+            column_stats = stats.setdefault((day, column), [0, 0, 0 if column in orphans else None, None, None])
+            column_stats[0] += 1
+            if value is None:
+                column_stats[1] += 1
+            else:
+                if column_stats[3] is None or value < column_stats[3]:
+                    column_stats[3] = value
+                if column_stats[4] is None or value > column_stats[4]:
+                    column_stats[4] = value
+                if column in spec['distinct']:
+                    values.setdefault((day, column), set()).add(value)
+            if orphans.get(column):
+                column_stats[2] += 1
+    return stats, values, last_row_id, last_created_at
+
+def profile_data_quality(db_file=None):
+    """Incrementally update agg_data_quality_profile from rows added since the last run
+
+    New rows are found by primary key past the stored watermark (created_at is
+    stored in mixed formats, so it can't be range-scanned directly) and bucketed
+    by their normalized created_at day. Counts and min/max merge into the stored
+    day profiles; distinct counts are exact via agg_data_quality_values.
+    Returns the number of rows profiled.
+
+    Stats describe rows as they were when first profiled: later updates (a
+    sentiment backfill, entity_id mapping, a parent row arriving) do not
+    change the stored null or orphan counts.
+
+    The whole run holds a write lock from the watermark reads to the commit,
+    so overlapping runs wait for each other instead of double counting.
+    """
+    conn = sqlite3.connect(db_file or DB_FILE)
+    try:
+        conn.executescript(DATA_QUALITY_SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        profiled = 0
+        for table, spec in DATA_QUALITY_PROFILES.items():
+            if table not in existing:
+                continue
+            watermark = conn.execute(
+                "SELECT last_row_id FROM etl_watermark WHERE job_name = 'data_quality' AND table_name = ?",
+                (table,)
+            ).fetchone()
+            after_row_id = watermark[0] if watermark else 0
+
+            stats, values, last_row_id, last_created_at = profile_table_batch(conn, table, spec, after_row_id)
+            if last_row_id == after_row_id:
+                continue
+
+            conn.executemany("""
+                INSERT INTO agg_data_quality_profile (
+                    profile_date, table_name, column_name,
+                    row_count, null_count, orphan_count, min_value, max_value
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(profile_date, table_name, column_name) DO UPDATE SET
+                    row_count = row_count + excluded.row_count,
+                    null_count = null_count + excluded.null_count,
+                    orphan_count = CASE WHEN excluded.orphan_count IS NULL THEN orphan_count
+                                        ELSE COALESCE(orphan_count, 0) + excluded.orphan_count END,
+                    min_value = MIN(COALESCE(min_value, excluded.min_value), COALESCE(excluded.min_value, min_value)),
+                    max_value = MAX(COALESCE(max_value, excluded.max_value), COALESCE(excluded.max_value, max_value)),
+                    created_at = CURRENT_TIMESTAMP
+            """, [(day, table, column, *column_stats) for (day, column), column_stats in stats.items()])
+
+            conn.executemany("""
+                INSERT OR IGNORE INTO agg_data_quality_values (profile_date, table_name, column_name, value)
+                VALUES (?, ?, ?, ?)
+            """, [(day, table, column, value) for (day, column), seen in values.items() for value in seen])
+            conn.executemany("""
+                UPDATE agg_data_quality_profile
+                SET distinct_count = (
+                    SELECT COUNT(*) FROM agg_data_quality_values v
+                    WHERE v.profile_date = ? AND v.table_name = ? AND v.column_name = ?
+                )
+                WHERE profile_date = ? AND table_name = ? AND column_name = ?
+            """, [(day, table, column) * 2 for (day, column) in values])
+
+            conn.execute("""
+                INSERT INTO etl_watermark (job_name, table_name, last_row_id, last_created_at)
+                VALUES ('data_quality', ?, ?, ?)
+                ON CONFLICT(job_name, table_name) DO UPDATE SET
+                    last_row_id = excluded.last_row_id,
+                    last_created_at = MAX(COALESCE(last_created_at, ''), COALESCE(excluded.last_created_at, '')),
+                    updated_at = CURRENT_TIMESTAMP
+            """, (table, last_row_id, last_created_at))
+            profiled += sum(column_stats[0] for (day, column), column_stats in stats.items()
+                            if column == TABLE_ROW_COLUMN)
+        conn.commit()
+        return profiled
+    finally:
+        conn.close()
+
 # ============================================================================
 # FIELD HQ ENDPOINTS
 # ============================================================================
 
 @app.route('/api/field-hq/data-quality', methods=['GET'])
+@query_guard()
 def hq_data_quality():
-    """Data quality metrics"""
+    """Data quality metrics from stored profiles (see profile_data_quality)
+
+    Query params: time_range (days of coverage trend, default 90).
+    """
     try:
+        try:
+            days = int(request.args.get('time_range', '90'))
+        except ValueError:
+            days = 90
+
         conn = get_db()
+        if not table_exists(conn, 'agg_data_quality_profile'):
+            conn.close()
+            return jsonify({
+                'total_conversations': 0,
+                'sentiment_coverage_pct': 0,
+                'entity_mentions': 0,
+                'issues_classified': 0,
+                'columns': [],
+                'trend': [],
+                'profiled_through': {},
+                'hint': 'Run: python backend.py profile-data-quality',
+                'timestamp': datetime.now().isoformat()
+            })
+
         cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM fact_conversation")
-        total_conversations = cursor.fetchone()[0] or 0
-        
-        cursor.execute("SELECT COUNT(*) FROM fact_conversation WHERE overall_sentiment IS NOT NULL")
-        sentiment_coverage = cursor.fetchone()[0] or 0
-        
-        # Check if fact_entity_mention exists (different name in actual schema)
-        try:
-            cursor.execute("SELECT COUNT(*) FROM fact_entity_mention")
-            entity_mentions = cursor.fetchone()[0] or 0
-        except:
-            entity_mentions = 0
-        
-        cursor.execute("SELECT COUNT(DISTINCT outcome_status) FROM fact_conversation WHERE outcome_status IS NOT NULL")
+        cursor.execute("""
+            SELECT 
+                table_name,
+                column_name,
+                SUM(row_count) as row_count,
+                SUM(null_count) as null_count,
+                SUM(orphan_count) as orphan_count,
+                MIN(min_value) as min_value,
+                MAX(max_value) as max_value
+            FROM agg_data_quality_profile
+            GROUP BY table_name, column_name
+        """)
+        totals = {(row['table_name'], row['column_name']): dict(row) for row in cursor.fetchall()}
+
+        cursor.execute("""
+            SELECT COUNT(DISTINCT value) FROM agg_data_quality_values
+            WHERE table_name = 'fact_conversation' AND column_name = 'outcome_status'
+        """)
         issues_classified = cursor.fetchone()[0] or 0
-        
+
+        cursor.execute(f"""
+            SELECT 
+                profile_date,
+                table_name,
+                column_name,
+                row_count,
+                ROUND(null_count * 100.0 / row_count, 1) as null_pct,
+                distinct_count,
+                orphan_count
+            FROM agg_data_quality_profile
+            WHERE profile_date >= date('now', '-{days} days') AND column_name != '{TABLE_ROW_COLUMN}'
+            ORDER BY profile_date, table_name, column_name
+        """)
+        trend = rows_to_dicts(cursor.fetchall())
+
+        cursor.execute("""
+            SELECT table_name, last_created_at FROM etl_watermark WHERE job_name = 'data_quality'
+        """)
+        profiled_through = {row['table_name']: row['last_created_at'] for row in cursor.fetchall()}
         conn.close()
-        
+
+        def total(table, column=TABLE_ROW_COLUMN, field='row_count'):
+            return (totals.get((table, column)) or {}).get(field) or 0
+
+        total_conversations = total('fact_conversation')
+        sentiment_coverage = total_conversations - total('fact_conversation', 'overall_sentiment', 'null_count')
         sentiment_pct = (sentiment_coverage / total_conversations * 100) if total_conversations > 0 else 0
-        
+
+        columns = []
+        for (table, column), stats in sorted(totals.items()):
+            if column == TABLE_ROW_COLUMN:
+                continue
+            columns.append({
+                **stats,
+                'null_pct': round(stats['null_count'] * 100.0 / stats['row_count'], 1) if stats['row_count'] else 0,
+            })
+
         return jsonify({
             'total_conversations': total_conversations,
             'sentiment_coverage_pct': round(sentiment_pct, 1),
-            'entity_mentions': entity_mentions,
+            'entity_mentions': total('fact_entity_mention'),
             'issues_classified': issues_classified,
+            'columns': columns,
+            'trend': trend,
+            'profiled_through': profiled_through,
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -589,7 +2177,21 @@ def not_found(e):
 def server_error(e):
     return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
+# Offline batch jobs, run as: python backend.py <command>
+BATCH_COMMANDS = {
+    'build-scorecards': build_agent_scorecards,
+    'build-geo-cells': build_geo_cells,
+    'build-funnel': build_conversion_funnel,
+    'profile-data-quality': profile_data_quality,
+    'match-entities': match_discovered_entities,
+}
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] in BATCH_COMMANDS:
+        result = BATCH_COMMANDS[sys.argv[1]]()
+        print(f"{sys.argv[1]}: {result}")
+        sys.exit(0)
+
     # Get port from environment variable for Azure, default to 5000 for local
     port = int(os.environ.get('PORT', 5000))
     # Use 0.0.0.0 for Azure deployment
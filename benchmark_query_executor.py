@@ -0,0 +1,111 @@
+"""
+Benchmark the concurrent query executor on multi-query endpoints
+Builds a synthetic database, then compares running the mission brief tile
+queries one after another on a single connection (the old behaviour) with
+run_queries(), for single-request latency and for throughput with several
+request threads in one worker.
+
+Usage: python benchmark_query_executor.py [conversation_count]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'field_intelligence_bench.db')
+os.environ['DB_FILE'] = DB_PATH
+
+import backend  # noqa: E402  (DB_FILE must be set first)
+
+def create_database(conversation_count):
+    """Minimal fact_conversation + dim_date with random data"""
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    conn = sqlite3.connect(DB_PATH)
+    conn.executescript("""
+        CREATE TABLE dim_date (date_id INTEGER PRIMARY KEY, calendar_date DATE UNIQUE);
+        CREATE TABLE fact_conversation (
+            conversation_id INTEGER PRIMARY KEY,
+            region_id INTEGER,
+            channel_id INTEGER,
+            call_date DATE NOT NULL,
+            overall_sentiment REAL,
+            conversion_confidence REAL,
+            has_appointment INTEGER DEFAULT 0
+        );
+        CREATE INDEX idx_fact_conversation_date ON fact_conversation(call_date);
+    """)
+    today = date.today()
+    days = [(today - timedelta(days=i)).isoformat() for i in range(400)]
+    conn.executemany("INSERT INTO dim_date (date_id, calendar_date) VALUES (?, ?)",
+                     [(int(d.replace('-', '')), d) for d in days])
+    conn.executemany("""
+        INSERT INTO fact_conversation
+        (region_id, channel_id, call_date, overall_sentiment, conversion_confidence, has_appointment)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, ((random.randint(1, 5), random.randint(1, 4), random.choice(days),
+           random.uniform(-1, 1), random.random(), random.randint(0, 1))
+          for _ in range(conversation_count)))
+    conn.commit()
+    conn.close()
+
+def sequential_tiles(where_clause):
+    """Old behaviour: every tile query in turn on one connection"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return {name: conn.execute(sql).fetchall()
+                for name, sql in backend.mission_brief_queries(where_clause).items()}
+    finally:
+        conn.close()
+
+def pooled_tiles(where_clause):
+    return backend.run_queries(backend.mission_brief_queries(where_clause))
+
+def latency(fn, where_clause, repeat=10):
+    fn(where_clause)  # warm up connections and page cache
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(where_clause)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+def throughput(fn, where_clause, request_threads=4, duration=3.0):
+    """Requests per second with `request_threads` concurrent callers"""
+    completed = [0] * request_threads
+    stop_at = time.perf_counter() + duration
+
+    def client(index):
+        while time.perf_counter() < stop_at:
+            fn(where_clause)
+            completed[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(request_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(completed) / duration
+
+def run_benchmark(conversation_count):
+    print(f"Building {conversation_count} conversations in {DB_PATH}...")
+    create_database(conversation_count)
+    where_clause = backend.build_where_clause({'time_range': '365'}, use_date_join=True)
+
+    # Overlap needs free cores: on a single CPU the pool can only add overhead
+    print(f"CPUs: {os.cpu_count()}, pool threads: {backend.QUERY_POOL_SIZE}")
+    print(f"{'mode':<12} {'p50 latency (ms)':>17} {'req/s (4 threads)':>18}")
+    for label, fn in [('sequential', sequential_tiles), ('run_queries', pooled_tiles)]:
+        p50 = latency(fn, where_clause)
+        rps = throughput(fn, where_clause)
+        print(f"{label:<12} {p50 * 1000:>17.1f} {rps:>18.1f}")
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    run_benchmark(count)
@@ -0,0 +1,67 @@
+"""
+Benchmark chart response formats (rows vs columns vs packed)
+Builds an outcome-trend shaped result set in memory and times how long each
+format takes to turn the executed cursor into a response, plus payload size.
+
+Usage: python benchmark_response_formats.py [row_count ...]
+"""
+
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+from backend import app, rows_response, PACKED_MIMETYPE
+
+OUTCOMES = ['CONVERTED', 'LOST', 'FOLLOW_UP', 'NO_DECISION', 'Unknown']
+
+def create_result_table(row_count):
+    """In-memory table shaped like /api/field-strategy/outcome-trend output"""
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE trend (calendar_date TEXT, outcome_name TEXT, outcome_count INTEGER)")
+    start = date(2025, 1, 1)
+    conn.executemany(
+        "INSERT INTO trend VALUES (?, ?, ?)",
+        [((start + timedelta(days=i // len(OUTCOMES))).isoformat(),
+          OUTCOMES[i % len(OUTCOMES)],
+          random.randint(0, 500)) for i in range(row_count)]
+    )
+    return conn
+
+def time_format(conn, query_string, headers=None, repeat=5):
+    """Best-of-N seconds to build the response, and its payload size in bytes"""
+    best = None
+    size = 0
+    for _ in range(repeat):
+        with app.test_request_context(f'/bench?{query_string}', headers=headers or {}):
+            cursor = conn.execute("SELECT calendar_date, outcome_name, outcome_count FROM trend")
+            started = time.perf_counter()
+            response = rows_response(cursor)
+            body = response.get_data()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        size = len(body)
+    return best, size
+
+def run_benchmark(row_counts):
+    print(f"{'rows':>9}  {'format':<8} {'time (ms)':>10} {'size (KB)':>10} {'vs rows':>8}")
+    for row_count in row_counts:
+        conn = create_result_table(row_count)
+        baseline = None
+        for label, query_string, headers in [
+            ('rows', '', None),
+            ('columns', 'format=columns', None),
+            ('packed', '', {'Accept': PACKED_MIMETYPE}),
+        ]:
+            elapsed, size = time_format(conn, query_string, headers)
+            if baseline is None:
+                baseline = elapsed
+            print(f"{row_count:>9}  {label:<8} {elapsed * 1000:>10.1f} {size / 1024:>10.1f} "
+                  f"{baseline / elapsed:>7.1f}x")
+        conn.close()
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    run_benchmark(counts)
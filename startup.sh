@@ -7,8 +7,20 @@ echo "Starting Field Intelligence Platform..."
 export HOST=0.0.0.0
 export DEBUG=False
 
+# Query guard limits (per worker). Gunicorn gets more threads than the guard
+# admits, so excess requests actually queue and, past the queue, get 503s
+# (defaults match backend.py)
+export MAX_CONCURRENT_QUERIES=${MAX_CONCURRENT_QUERIES:-4}
+export MAX_QUEUED_QUERIES=${MAX_QUEUED_QUERIES:-6}
+THREADS=$((MAX_CONCURRENT_QUERIES + MAX_QUEUED_QUERIES + 2))
+
+# Data quality profiles are incremental: catch up on rows loaded since the
+# last run before serving, then keep catching up so new ETL loads get counted
+python backend.py profile-data-quality
+(while sleep ${PROFILE_INTERVAL_SECONDS:-900}; do python backend.py profile-data-quality; done) &
+
 # Start Gunicorn with Flask app
-gunicorn --bind=0.0.0.0:8000 --timeout 600 --workers=4 backend:app
+gunicorn --bind=0.0.0.0:8000 --timeout 600 --workers=4 --threads=$THREADS backend:app
 
 
 